@@ -19,10 +19,9 @@ You must encode:
 """
 
 
-from typing import Tuple, Iterable
-import math
-
+from array import array
 from typing import Tuple, Iterable, List
+from functools import lru_cache
 import math
 
 def to_cnf(input_path: str) -> Tuple[Iterable[Iterable[int]], int]:
@@ -40,71 +39,90 @@ def to_cnf(input_path: str) -> Tuple[Iterable[Iterable[int]], int]:
     B = int(math.isqrt(N))
     assert B * B == N, "N must be a perfect square (e.g., 9, 16, 25)"
 
-    def var_id(r: int, c: int, v: int) -> int:
-        # r,c in 0..N-1 ; v in 1..N
-        return r * N * N + c * N + v
+    structure, num_vars = _structural_cnf(N)
+    return [*structure, *_clue_clauses(N, grid)], num_vars
+
+
+def _var_table(N: int) -> List[List[List[int]]]:
+    # var[r][c][v - 1] == r*N*N + c*N + v, built once; the rules only index into it
+    return [[[r * N * N + c * N + v for v in range(1, N + 1)] for c in range(N)] for r in range(N)]
+
+
+@lru_cache(maxsize=4)
+def _structural_cnf(N: int) -> Tuple[Tuple[array, ...], int]:
+    """
+    Encode rules (1)-(5) for an N×N board.
+
+    These only depend on N, so the result is cached per N; repeated encodes
+    of the same size reuse it and only the clue clauses are rebuilt. Each
+    clause is an array('i') (4 bytes per literal) and is shared between
+    calls, so callers must not modify them.
+    """
+    B = math.isqrt(N)
+    var = _var_table(N)
+    # by_value[v - 1][r][c] == var[r][c][v - 1], i.e. the same table with the value axis first
+    by_value = [[[var[r][c][v] for c in range(N)] for r in range(N)] for v in range(N)]
 
     clauses: List[List[int]] = []
+    emit = clauses.append
+
+    # Auxiliary variables for the sequential counters live after the N^3 cell vars
+    next_var = N ** 3 + 1
 
     def exactly_one(lits: List[int]) -> None:
+        nonlocal next_var
         # at least one
-        clauses.append(list(lits))
-        # at most one (pairwise)
-        for i in range(len(lits)):
-            for j in range(i + 1, len(lits)):
-                clauses.append([-lits[i], -lits[j]])
-
-    # (1) Exactly one value per cell
-    for r in range(N):
-        for c in range(N):
-            exactly_one([var_id(r, c, v) for v in range(1, N + 1)])
-
+        emit(list(lits))
+        # at most one (Sinz sequential counter): s_i <=> "one of lits[0..i] is true"
+        k = len(lits)
+        if k < 2:
+            return
+        s = list(range(next_var, next_var + k - 1))
+        next_var += k - 1
+        emit([-lits[0], s[0]])
+        for i in range(1, k - 1):
+            emit([-lits[i], s[i]])
+            emit([-s[i - 1], s[i]])
+            emit([-lits[i], -s[i - 1]])
+        emit([-lits[k - 1], -s[k - 2]])
+
+    # Every exactly-one group is a different slice of the same var table, so
+    # collect all of them first and emit their clauses in a single pass:
+    # (1) Cell: each cell has exactly one value
+    groups: List[List[int]] = [cell_vars for row in var for cell_vars in row]
     # (2) Row: for each value v and each row r, exactly one column c has v
-    for v in range(1, N + 1):
-        for r in range(N):
-            exactly_one([var_id(r, c, v) for c in range(N)])
-
+    groups += [row for plane in by_value for row in plane]
     # (3) Column: for each value v and each column c, exactly one row r has v
-    for v in range(1, N + 1):
-        for c in range(N):
-            exactly_one([var_id(r, c, v) for r in range(N)])
-
+    groups += [list(column) for plane in by_value for column in zip(*plane)]
     # (4) Box: for each value v and each B×B box, exactly one cell has v
-    for v in range(1, N + 1):
-        for br in range(B):
-            for bc in range(B):
-                box_lits = []
-                for i in range(B):
-                    for j in range(B):
-                        r = br * B + i
-                        c = bc * B + j
-                        box_lits.append(var_id(r, c, v))
-                exactly_one(box_lits)
+    groups += [
+        [x for row in plane[br:br + B] for x in row[bc:bc + B]]
+        for plane in by_value
+        for br in range(0, N, B)
+        for bc in range(0, N, B)
+    ]
+    for group in groups:
+        exactly_one(group)
 
     # (5) Non-consecutive rule: orthogonal neighbors cannot differ by 1
-    # For each adjacent pair, forbid (r,c)=v together with neighbor = v±1
-    for r in range(N):
-        for c in range(N):
-            if c + 1 < N:
-                for v in range(1, N + 1):
-                    if v - 1 >= 1:
-                        clauses.append([-var_id(r, c, v), -var_id(r, c + 1, v - 1)])
-                    if v + 1 <= N:
-                        clauses.append([-var_id(r, c, v), -var_id(r, c + 1, v + 1)])
-            if r + 1 < N:
-                for v in range(1, N + 1):
-                    if v - 1 >= 1:
-                        clauses.append([-var_id(r, c, v), -var_id(r + 1, c, v - 1)])
-                    if v + 1 <= N:
-                        clauses.append([-var_id(r, c, v), -var_id(r + 1, c, v + 1)])
-
-    # (6) Clues: unit clauses for given digits
-    for r in range(N):
-        for c in range(N):
-            v = grid[r][c]
-            if v > 0:
-                clauses.append([var_id(r, c, v)])
-
-    num_vars = N ** 3
-    return clauses, num_vars
-
+    # For each adjacent pair (a, b), forbid a=v together with b=v+1 and b=v-1,
+    # i.e. pair a's negated value list with b's shifted by one in either direction
+    neg = [[[-x for x in cell_vars] for cell_vars in row] for row in var]
+    neighbours = [(neg[r][c], neg[r][c + 1]) for r in range(N) for c in range(N - 1)]
+    neighbours += [(neg[r][c], neg[r + 1][c]) for r in range(N - 1) for c in range(N)]
+    for a, b in neighbours:
+        clauses += map(list, zip(a, b[1:]))
+        clauses += map(list, zip(a[1:], b))
+
+    num_vars = next_var - 1
+    return tuple(array('i', clause) for clause in clauses), num_vars
+
+
+def _clue_clauses(N: int, grid: List[List[int]]) -> List[array]:
+    # (6) Clues: unit clauses for given digits, one per nonzero cell
+    return [
+        array('i', [r * N * N + c * N + v])
+        for r, row in enumerate(grid)
+        for c, v in enumerate(row)
+        if v > 0
+    ]
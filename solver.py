@@ -6,24 +6,73 @@ THIS is the file to edit.
 Implement: solve_cnf(clauses) -> (status, model_or_None)"""
 
 from typing import Iterable, List, Tuple
+import hashlib
+import json
+import os
+import pickle
 
-from utils.visualize_sudoku import visualize_sudoku
 from utils.cdcl import CDCL
 from utils.dpll import DPLL
 
+# Results of earlier solves, one JSON file per CNF; only used with SAT_CACHE=1
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "p1_sat")
+# Part of every cache key: bump it whenever a solver change can change a result,
+# so entries written by an older solver are never returned
+_CACHE_VERSION = 1
+
+
+def _cache_file(clauses: List[Iterable[int]], num_vars: int) -> str:
+    """
+    Cache file for a CNF, keyed by a hash of _CACHE_VERSION and the CNF's
+    canonical form (literals and clauses sorted), so clause order does not matter.
+    """
+    canonical = sorted(tuple(sorted(clause)) for clause in clauses)
+    key = hashlib.blake2b(pickle.dumps((_CACHE_VERSION, num_vars, canonical))).hexdigest()
+    return os.path.join(_CACHE_DIR, key + ".json")
+
+
 def solve_cnf(clauses: Iterable[Iterable[int]], num_vars: int) -> Tuple[str, List[int] | None]:
     """
-    Convenience wrapper: construct a DPLL solver and solve the CNF.
+    Convenience wrapper: construct a CDCL solver and solve the CNF.
+    With SAT_CACHE=1, results are memoized on disk under ~/.cache/p1_sat,
+    so solving the same CNF again skips the solver. Off by default, so
+    solving has no side effects outside the process.
 
     Parameters
     - clauses: iterable of clauses (each clause an iterable of signed ints)
     - num_vars: maximum variable index (variables are 1..num_vars)
 
-    Returns the same tuple as `DPLL.solve()`.
+    Returns the same tuple as `CDCL.solve()`.
     """
+    clauses = list(clauses)
+    if os.environ.get("SAT_CACHE", "0") != "1":
+        return CDCL(clauses, num_vars).solve()
+
+    # The key is built by iterating every clause, so the solver must get copies
+    clauses = [list(clause) for clause in clauses]
+    cache_file = _cache_file(clauses, num_vars)
+    try:
+        with open(cache_file, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        entry = None  # not cached yet (or unreadable), solve it
+    # Anything but a [status, model] pair (hand edit, older format) is ignored as well
+    if isinstance(entry, list) and len(entry) == 2 and entry[0] in ("SAT", "UNSAT"):
+        return entry[0], entry[1]
+
     solved, result = CDCL(clauses, num_vars).solve()
 
-    # if solved == 'SAT':
-    #     n = int(round(num_vars ** (1/3)))
-    #     visualize_sudoku(result, n)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(tmp_file, "w") as f:
+            json.dump([solved, result], f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # caching is best effort, but don't leave a partial file behind
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
     return solved, result
@@ -1,14 +1,44 @@
 from utils.types import Clauses
-from .sat import *
+from .sat import VSIDSPick
 
-class CDCL(FirstPick):
+def luby(i: int) -> int:
+    """
+    i-th element (0-based) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    # Find the finite subsequence of length 2^seq - 1 that contains index i
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    # Descend into the repeated halves until i is the last element of one
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+class CDCL(VSIDSPick):
     def __init__(self, clauses: Clauses, num_vars: int):
         """
         CDCL constructor: add reason and level tracking for conflict analysis and clause learning.
         """
         super().__init__(clauses, num_vars)
-        self.reason_of = {var: None for var in range(1, num_vars + 1)}
-        self.level_of = {var: -1 for var in range(1, num_vars + 1)}
+        # Indexed by var, index 0 unused
+        self.reason_of = [None] * (num_vars + 1)
+        self.level_of = [-1] * (num_vars + 1)
+
+        # Learnt clause database: clauses from first_learnt on are learnt, with their LBD
+        # (number of distinct decision levels) in learnt_lbd; halved every reduce_interval conflicts
+        self.first_learnt = self.num_clauses()
+        self.learnt_lbd = []
+        self.conflicts = 0
+        self.reduce_interval = 2000
+        self.next_reduce = self.reduce_interval
+
+        # Luby restarts: the i-th restart happens restart_unit * luby(i) conflicts after the previous one
+        self.restart_unit = 100
+        self.restarts = 0
+        self.next_restart = self.restart_unit * luby(0)
 
     def solve(self) -> tuple[str, list[int] | None]:
         """
@@ -18,27 +48,26 @@ class CDCL(FirstPick):
 
         CDCL differs in that conflicts are analyzed to learn new clauses,
         """
-        # Run initial propagation
-        if self.propagate() is not None:
+        # Assign unit clauses at the root level and run initial propagation
+        if self.root_unsat or not self.process_initial_unit_clauses() or self.propagate() is not None:
             self.progress_bar.close()
             return 'UNSAT', None # Conflict at root level
 
         # main loop
         while True:
-            decision_lit = self.pick_unassigned_literal()
-            
-            if decision_lit is None:
+            # Propagation is done here, so it is safe to give up all decisions
+            if self.conflicts >= self.next_restart:
+                self.restart()
+
+            if self.trail_top == self.num_vars:
                 # No unassigned vars, no conflict -> SAT
                 self.progress_bar.close()
-                true_vars = [i for i, v in self.assignment.items() if v == 1]
+                true_vars = [i for i, v in enumerate(self.assignment) if v == 1]
                 return 'SAT', true_vars
 
             # Pick a decision literal post. var
+            # (never None here: the full-trail check above already returned SAT)
             decision_lit = self.pick_unassigned_literal()
-            if decision_lit is None:
-                # all assigned but not solved, so it UNSAT
-                self.progress_bar.close()
-                return 'UNSAT', None
 
             # Make a decision
             self.push_decision_level(decision_lit)
@@ -57,6 +86,9 @@ class CDCL(FirstPick):
                     self.progress_bar.close()
                     return 'UNSAT', None
                 
+                self.conflicts += 1
+                self.decay_activity()
+
                 # Add the new clause to the knowledge base
                 new_ci = self.add_clause(learnt_clause)
                 
@@ -64,6 +96,11 @@ class CDCL(FirstPick):
                 asserting_lit = learnt_clause[0] # 1UIP is always at index 0
                 self.backjump(backjump_level, new_ci, asserting_lit)
 
+                if self.conflicts >= self.next_reduce:
+                    self.reduce_learnt_clauses()
+                    self.reduce_interval += 300
+                    self.next_reduce = self.conflicts + self.reduce_interval
+
     def _assign_internal(self, lit: int, level: int, reason: int | None):
         """
         Expand internal assignment to record conflict data.
@@ -89,98 +126,133 @@ class CDCL(FirstPick):
             
         Returns:
             Tuple[List[int], int]:
-            - The new learnt clause (list of lits), with the 1UIP at index 0.
+            - The new learnt clause (list of lits), with the 1UIP at index 0
+              and a literal from the backjump level at index 1.
             - The level (int) to backjump to. (-1 for root conflict).
         """
         current_level = self.get_current_level()
         if current_level == 0:
             return [], -1  # Conflict at root level
 
-        # get literals of the conflicting clause
-        current_clause_lits = set(self.clauses[conflict_clause_index]) 
+        # The loops below only touch these flat arrays, bound once as locals
+        lits = self.lits
+        clause_start = self.clause_start
+        trail = self.assignment_trail
+        level_of = self.level_of
+        reason_of = self.reason_of
+
+        # literals of the conflicting clause, iterated as is: seen_variables skips repeats
+        current_clause_lits = lits[clause_start[conflict_clause_index]:clause_start[conflict_clause_index + 1]]
         
-        learnt_clause_lits = set()
+        # learnt clause, index 0 is reserved for the 1UIP literal; seen_variables
+        # guarantees each var is appended at most once
+        learnt_clause_lits = [0]
         
-        # vars at the current level that we still need to process
-        lits_at_current_level = set() 
+        # number of seen vars at the current level that we still need to process
+        lits_at_current_level = 0
         
-        # set of all vars we've seen to avoid redundant processing
-        seen_variables = set() 
+        # flag per var we've seen to avoid redundant processing;
+        # VSIDS bumps every var once, when it is first marked seen
+        seen_variables = bytearray(self.num_vars + 1)
+        bump_activity = self.bump_activity
         
-        # level we will backjump to (the 2nd highest level in the clause)
+        # level we will backjump to (the 2nd highest level in the clause),
+        # and the index of a learnt literal assigned at that level
         backjump_level = 0 
+        backjump_lit_idx = 0
         
         for lit in current_clause_lits:
-            var = abs(lit)
-            seen_variables.add(var)
-            if self.level_of[var] == current_level:
-                lits_at_current_level.add(var)
+            var = lit if lit > 0 else -lit
+            if seen_variables[var]:
+                continue
+            seen_variables[var] = 1
+            bump_activity(var)
+            if level_of[var] == current_level:
+                lits_at_current_level += 1
             else:
-                learnt_clause_lits.add(lit)
-                backjump_level = max(backjump_level, self.level_of[var])
+                if level_of[var] > backjump_level:
+                    backjump_level = level_of[var]
+                    backjump_lit_idx = len(learnt_clause_lits)
+                learnt_clause_lits.append(lit)
 
         # To learn from the conflict, we need to look through the assignment trail in reverse,
         # trying to find the firstUIP (Unique Implication Point).
-        trail_idx = len(self.assignment_trail) - 1
+        trail_idx = self.trail_top - 1
         
         first_uip_lit = None  # This will hold our firstUIP
 
         while True:
-            # Find the most recent assignment on the trail that is in our
-            # "to process" set.
-            lit_on_trail = self.assignment_trail[trail_idx]
-            var_on_trail = abs(lit_on_trail)
+            # Find the most recent assignment on the trail that we still have to process.
+            # Walking back from the conflict we never leave the current level, so any
+            # seen var on the way is one of the current level vars being counted.
+            lit_on_trail = trail[trail_idx]
+            var_on_trail = lit_on_trail if lit_on_trail > 0 else -lit_on_trail
             trail_idx -= 1
             
-            if var_on_trail not in lits_at_current_level:
-                continue # Skip variables not in the current level set
+            if not seen_variables[var_on_trail]:
+                continue # Skip variables not involved in the conflict
 
             # This is the variable we are "resolving".
-            lits_at_current_level.remove(var_on_trail)
+            lits_at_current_level -= 1
             
-            # if all vars on the trail are removed, we found the first one
+            # if it was the last one left to process, we found the first one
             if not lits_at_current_level:
                 # The asserting literal is its negation.
                 first_uip_lit = -lit_on_trail 
                 break
             
             # --- 4. Resolve: Add reason clause lits ---
-            reason_clause_index = self.reason_of[var_on_trail]
+            reason_clause_index = reason_of[var_on_trail]
             
-            for reason_literal in self.clauses[reason_clause_index]:
-                reason_variable = abs(reason_literal)
+            for reason_literal in lits[clause_start[reason_clause_index]:clause_start[reason_clause_index + 1]]:
+                reason_variable = reason_literal if reason_literal > 0 else -reason_literal
                 if reason_variable == var_on_trail:
                     continue  # Skip the variable we're resolving
                 
-                if reason_variable not in seen_variables:
-                    seen_variables.add(reason_variable)
+                if not seen_variables[reason_variable]:
+                    seen_variables[reason_variable] = 1
+                    bump_activity(reason_variable)
                     
-                    if self.level_of[reason_variable] == current_level:
-                        lits_at_current_level.add(reason_variable)
+                    if level_of[reason_variable] == current_level:
+                        lits_at_current_level += 1
                     else:
-                        learnt_clause_lits.add(reason_literal)
-                        backjump_level = max(backjump_level, self.level_of[reason_variable])
+                        if level_of[reason_variable] > backjump_level:
+                            backjump_level = level_of[reason_variable]
+                            backjump_lit_idx = len(learnt_clause_lits)
+                        learnt_clause_lits.append(reason_literal)
 
-        # Build Clause
-        final_learnt_clause = list(learnt_clause_lits)
-        
         # Put first_uip at the front as the asserting literal
-        final_learnt_clause.insert(0, first_uip_lit)
-        
-        return final_learnt_clause, backjump_level
+        learnt_clause_lits[0] = first_uip_lit
+        # add_clause watches indices 0 and 1. Put a backjump level literal at 1:
+        # it is the last one to be unassigned, so the watch stays valid after
+        # the backjump and the clause wakes up as soon as it can matter again
+        if backjump_lit_idx > 1:
+            learnt_clause_lits[1], learnt_clause_lits[backjump_lit_idx] = (
+                learnt_clause_lits[backjump_lit_idx], learnt_clause_lits[1])
+
+        return learnt_clause_lits, backjump_level
 
     def add_clause(self, clause_literals: list[int]) -> int:
         """
         Adds a new learnt clause to the solver's database.
         """
-        new_clause_index = len(self.clauses)
-        self.clauses.append(list(clause_literals)) # Store a new copy
+        new_clause_index = self.num_clauses()
+        self.lits.extend(clause_literals)
+        self.clause_start.append(len(self.lits))
+
+        # LBD, taken while all literals are still assigned
+        level_of = self.level_of
+        self.learnt_lbd.append(len({level_of[lit if lit > 0 else -lit] for lit in clause_literals}))
         
-        # Only build watchers if clause has more than 2 literals
-        if len(clause_literals) >= 2:
+        # Only build watchers if clause has at least 2 literals; binary ones go to binary_watches
+        if len(clause_literals) == 2:
+            w1, w2 = clause_literals
+            self.binary_watches[w1].append((w2, new_clause_index))
+            self.binary_watches[w2].append((w1, new_clause_index))
+        elif len(clause_literals) > 2:
             w1, w2 = clause_literals[0], clause_literals[1]
-            self.watches[w1].append(new_clause_index)
-            self.watches[w2].append(new_clause_index)
+            self.watches[w1].append((new_clause_index, w2))
+            self.watches[w2].append((new_clause_index, w1))
         
         return new_clause_index
 
@@ -194,22 +266,93 @@ class CDCL(FirstPick):
         - Asserts the 'asserting_literal' at the backjump_level,
           setting its reason to 'learnt_clause_index'.
         """
+        self.cancel_until(backjump_level)
         
-        if backjump_level == 0:
-            target_trail_idx = 0 # Unassign everything
-        else:
-            target_trail_idx = self.level_start[backjump_level] # Start of the backjump level
+        # Assert the asserting literal at the backjump level
+        self._assign_internal(asserting_literal, backjump_level, learnt_clause_index)
+
+    def cancel_until(self, level: int):
+        """
+        Unwind the decision stack and assignment trail down to level,
+        unassigning everything above it and resetting self.prop_index.
+        """
+        # Start of the level just above the target level; root-level (level 0)
+        # assignments sit before level_start[0] and must survive a backjump to 0
+        target_trail_idx = self.level_start[level]
 
-        
         # Unassign everything until the target trail index
-        while len(self.assignment_trail) > target_trail_idx:
-            lit = self.assignment_trail.pop()
+        while self.trail_top > target_trail_idx:
+            self.trail_top -= 1
+            lit = self.assignment_trail[self.trail_top]
             self._unassign_internal(abs(lit))
         
-        self.decisions = self.decisions[:backjump_level]
-        self.level_start = self.level_start[:backjump_level]
-        self.prop_index = len(self.assignment_trail)
-        
-        # Assert the asserting literal at the backjump level
-        self._assign_internal(asserting_literal, backjump_level, learnt_clause_index)
+        self.decisions = self.decisions[:level]
+        self.level_start = self.level_start[:level]
+        self.prop_index = self.trail_top
+
+    def restart(self):
+        """
+        Restart the search: drop all decisions but keep learnt clauses and activities,
+        and schedule the next restart along the Luby sequence.
+        """
+        if self.decisions:
+            self.cancel_until(0)
+        self.restarts += 1
+        self.next_restart = self.conflicts + self.restart_unit * luby(self.restarts)
+
+    def reduce_learnt_clauses(self):
+        """
+        Shrink the learnt clause database.
+
+        - Keeps the better half of the learnt clauses by LBD, every glue clause (LBD <= 2)
+          and every clause that is currently the reason of an assignment.
+        - Compacts the kept clauses in the CSR arrays and remaps the clause indexes
+          in the watch lists and reason_of.
+        """
+        first_learnt = self.first_learnt
+        num_learnt = self.num_clauses() - first_learnt
+        learnt_lbd = self.learnt_lbd
+
+        keep = bytearray(num_learnt)
+        by_lbd = sorted(range(num_learnt), key=learnt_lbd.__getitem__)
+        for i in by_lbd[:num_learnt // 2]:
+            keep[i] = 1
+        for i in by_lbd[num_learnt // 2:]:
+            if learnt_lbd[i] <= 2:
+                keep[i] = 1
+        for reason in self.reason_of:
+            if reason is not None and reason >= first_learnt:
+                keep[reason - first_learnt] = 1
+
+        # Copy the kept clauses behind the original ones; remap[i] is the new index of learnt clause i
+        lits, clause_start = self.lits, self.clause_start
+        new_lits = lits[:clause_start[first_learnt]]
+        new_clause_start = clause_start[:first_learnt + 1]
+        new_lbd = []
+        remap = [-1] * num_learnt
+        for i in range(num_learnt):
+            if keep[i]:
+                clause_index = first_learnt + i
+                remap[i] = len(new_clause_start) - 1
+                new_lits += lits[clause_start[clause_index]:clause_start[clause_index + 1]]
+                new_clause_start.append(len(new_lits))
+                new_lbd.append(learnt_lbd[i])
+        self.lits, self.clause_start, self.learnt_lbd = new_lits, new_clause_start, new_lbd
+
+        for watch_list in self.watches:
+            watch_list[:] = [
+                (clause_index if clause_index < first_learnt else remap[clause_index - first_learnt], blocker)
+                for clause_index, blocker in watch_list
+                if clause_index < first_learnt or keep[clause_index - first_learnt]
+            ]
+        for watch_list in self.binary_watches:
+            watch_list[:] = [
+                (other_lit, clause_index if clause_index < first_learnt else remap[clause_index - first_learnt])
+                for other_lit, clause_index in watch_list
+                if clause_index < first_learnt or keep[clause_index - first_learnt]
+            ]
 
+        reason_of = self.reason_of
+        for var, reason in enumerate(reason_of):
+            if reason is not None and reason >= first_learnt:
+                reason_of[var] = remap[reason - first_learnt]
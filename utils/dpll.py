@@ -1,85 +1,92 @@
 
-from utils.types import Clause
-
-from .sat import *
+from .sat import FirstPick
+from utils.types import Clauses
 
 class DPLL(FirstPick):
+    flipped: bytearray
+
+    def __init__(self, clauses: Clauses, num_vars: int):
+        """
+        Initialize DPLL solver.
+        - flipped: per decision level, 1 once its opposite branch has been taken
+        """
+        super().__init__(clauses, num_vars)
+        self.flipped = bytearray()
+
+    def push_decision_level(self, lit: int):
+        """
+        Makes a new decision, with its opposite branch still untried.
+        """
+        self.flipped.append(0)
+        super().push_decision_level(lit)
     
     def solve(self) -> tuple[str, list[int] | None]:
         """
         DPLL solving procedure
         """
 
-        # Run initial propagation
-        if not self.propagate():
+        # Assign unit clauses at the root level and run initial propagation
+        if self.root_unsat or not self.process_initial_unit_clauses() or self.propagate() is not None:
             self.progress_bar.close()
             return 'UNSAT', None # Conflict at root level
         
         while True:
-            # If solved, return the model
-            decision_lit = self.pick_unassigned_literal()
-
-            if decision_lit is None:
+            if self.trail_top == self.num_vars:
                 # No unassigned vars, no conflict -> SAT
                 self.progress_bar.close()
-                true_vars = [i for i, v in self.assignment.items() if v == 1]
+                true_vars = [i for i, v in enumerate(self.assignment) if v == 1]
                 return 'SAT', true_vars
             
             # Pick a decision literal post. var
+            # (never None here: the full-trail check above already returned SAT)
             decision_lit = self.pick_unassigned_literal()
-            if decision_lit is None:
-                # all assigned but not solved, so it UNSAT
-                self.progress_bar.close()
-                return 'UNSAT', None
             
             # Make a decision
             self.push_decision_level(decision_lit)
 
             # Conflict due to propagation, backtrack until flip or no more decisions
             while True:
-                if self.propagate():
+                if self.propagate() is None:
                     break  # no conflict, keep searching
 
                 if not self.backtrack():
                     self.progress_bar.close()
                     return 'UNSAT', None  # no more decisions to backtrack, UNSAT
 
-    def propagate(self) -> bool:
+    def backtrack(self) -> bool:
         """
-        Performs 2WL based unit propagation.
-        Return True if no conflict found, False otherwise.
+        Undo decisions until one whose opposite branch is still untried, and take that branch.
+        Returns False if no such decision is left (UNSAT), True otherwise.
         """
-        return super().propagate() is None
+        # Levels whose decision already tried both values are just dropped;
+        # the trail is unwound once, down to the start of the level we flip
+        while self.decisions:
+            # Pop last decision and its level start
+            decision_lit = self.decisions.pop()
+            level_start_index = self.level_start.pop()
+            if self.flipped.pop():
+                continue  # Both decision tried, go back further
 
-    def backtrack(self) -> bool:
-        if not self.decisions:
-            return False  # nothing to backtrack as UNSAT
-        
-        # Pop last decision and its level start
-        decision = self.decisions.pop()
-        level_start_index = self.level_start.pop()
-
-        # Undo assignments at and after this level start
-        while len(self.assignment_trail) > level_start_index:
-            lit = self.assignment_trail.pop()
-            self._unassign_internal(abs(lit))
+            # Undo assignments at and after this level start
+            while self.trail_top > level_start_index:
+                self.trail_top -= 1
+                lit = self.assignment_trail[self.trail_top]
+                # DPLL keeps no per-var level/reason data, so plain unassign is enough
+                self.unassign(abs(lit))
 
-        self.prop_index = level_start_index
+            self.prop_index = level_start_index
 
-        # If we have not tried teh False decision, do it now
-        if not decision['tried_false']:
+            # We have not tried the opposite decision, do it now:
             # introduce level for this flipped decision
-            self.level_start.append(len(self.assignment_trail))
-            decision['tried_false'] = True
-            self.decisions.append(decision)
+            lit = -decision_lit
+            self.level_start.append(self.trail_top)
+            self.decisions.append(lit)
+            self.flipped.append(1)
 
-            # Assign the var to false (negative literal)
-            var = decision['var']
-            self.assign(-var, -1)
+            # Assign the negation of the original decision literal; pickers may
+            # decide either polarity, so this is not always var=False
+            self.assign(lit, 1 if lit > 0 else -1)
+            self.progress_bar.update(self.trail_top)
             return True  # backtrack successful, flipped decision
-        
-        self.progress_bar.update(self.assignment)
 
-        # Both decision tried, go back further with backtracking
-        return self.backtrack()
-        
\ No newline at end of file
+        return False  # nothing to backtrack as UNSAT
@@ -4,12 +4,10 @@ class ProgressBar:
     def __init__(self, num_vars: int, on: bool = True):
         self._progress_bar = tqdm(total=num_vars, desc="Assigned vars", unit="var") if on else None
 
-    def update(self, assignment: dict):
-        # update bar and show nodes explored as postfix
+    def update(self, num_assigned: int):
+        # move the bar to the current count; tqdm throttles the redraws itself
         if self._progress_bar is not None:
-            assigned = sum(1 for v in assignment.values() if v != 0)
-            self._progress_bar.n = assigned
-            self._progress_bar.refresh()
+            self._progress_bar.update(num_assigned - self._progress_bar.n)
 
     def close(self):
         if self._progress_bar is not None:
@@ -1,133 +1,154 @@
-from collections import deque
+from array import array
 from abc import abstractmethod, ABC
+from heapq import heapify, heappop, heappush
+from itertools import accumulate, chain
+import os
 import random as r
 
-# from utils.progress_bar import ProgressBar
-from utils.types import Clauses, Clause
+from utils.types import Clauses
 
 __all__ = [
     'FirstPick',
     'LastPick',
     'RandomPick',
     'HeuristicPick',
+    'VSIDSPick',
 ]
 
 class MockProgressBar:
     def __init__(self, num_vars: int, on: bool = True):
         pass
 
-    def update(self, assignment: dict[int, int]):
+    def update(self, num_assigned: int):
         pass
 
     def close(self):
         pass
 
 class SATSolver(ABC):
-    clauses: Clauses
-    assignment: dict[int, int]
-    assignment_trail: deque[int]
+    num_vars: int
+    lits: array
+    clause_start: array
+    assignment: array
+    lit_value: array
+    assignment_trail: array
+    trail_top: int
     decisions: list[int]
     level_start: list[int]
 
-    watches: dict[int, list[int]]
+    watches: list[list[tuple[int, int]]]
+    binary_watches: list[list[tuple[int, int]]]
     prop_index: int
+    root_unsat: bool
 
     progress_bar: MockProgressBar
 
     def __init__(self, clauses: Clauses, num_vars: int):
         """
         Initialize base solver.
-        - Set up assignment setting logic; setting dict, trail and decisions cacher
+        - Pack clauses into CSR form: clause i is lits[clause_start[i]:clause_start[i + 1]]
+        - Set up assignment setting logic; setting array (indexed by var), trail and decisions cacher
+          (lit_value and watches are indexed by the signed literal itself: +v at v, -v at
+          Python's negative index -v, so the hot loops need no abs() or sign branches)
+          (the trail is preallocated for num_vars literals; trail_top is its length)
         - Set up 2WL watchers and propagation index for efficient unit propagation
-        - Initialize progress bar
+          (each watch is a (clause_index, blocker) pair, the blocker being the clause's other watch;
+          binary clauses get (other_literal, clause_index) entries in binary_watches instead)
+        - Initialize progress bar (a tqdm bar with SAT_PROGRESS=1, a no-op otherwise)
 
-        - Build unit_clause_lits deque for initial unit clause processing
+        - Build unit_clause_lits list for initial unit clause processing
+          (root_unsat is set instead if the CNF contains an empty clause)
         """
 
-        self.clauses = [list(c) for c in clauses]
+        self.num_vars = num_vars
+        # Both arrays are filled straight from the clauses rather than grown clause by clause;
+        # that needs each clause's length, so clauses that are plain iterables are listed first
+        clauses = [clause if isinstance(clause, (list, tuple, array)) else list(clause) for clause in clauses]
+        self.clause_start = array('q', accumulate(map(len, clauses), initial=0))
+        self.lits = array('i', chain.from_iterable(clauses))
 
         # Initialize assignment structures
-        self.assignment = {var: 0 for var in range(1, num_vars + 1)}
-        self.assignment_trail = deque()
+        self.assignment = array('b', bytes(num_vars + 1))  # index 0 unused
+        self.lit_value = array('b', bytes(2 * num_vars + 1))  # index 0 unused
+        self.assignment_trail = array('i', [0]) * num_vars
+        self.trail_top = 0
         self.decisions = []
 
         # Set up 2-Watched Literals data structures
-        self.watches = {lit: [] for lit in range(-num_vars, num_vars + 1) if lit != 0}
+        self.watches = [[] for _ in range(2 * num_vars + 1)]
+        self.binary_watches = [[] for _ in range(2 * num_vars + 1)]
         self.prop_index = 0
         self.level_start = []
 
-        self.unit_clause_lits = deque()
+        self.unit_clause_lits = []
+        self.root_unsat = False
 
-        # Initialize progress bar
-        self.progress_bar = MockProgressBar(num_vars, on=False)
-        self.progress_bar.update(self.assignment)
+        # Initialize progress bar: off unless SAT_PROGRESS=1, so tqdm is only needed when asked for
+        if os.environ.get("SAT_PROGRESS", "0") == "1":
+            from utils.progress_bar import ProgressBar
+            self.progress_bar = ProgressBar(num_vars)
+        else:
+            self.progress_bar = MockProgressBar(num_vars, on=False)
 
         # Save clause indexes being watched
         # Save clause values into unit_clause_lits to process initially
-        for clause_index, clause in enumerate(self.clauses):
+        for clause_index in range(self.num_clauses()):
+            start = self.clause_start[clause_index]
+            length = self.clause_start[clause_index + 1] - start
 
-            # Make CNF impossible by adding contradiction
-            if len(clause) == 0:
-                self.unit_clause_lits.append(1)
-                self.unit_clause_lits.append(-1)
-                continue
+            # An empty clause can never be satisfied, solve() reports UNSAT right away
+            if length == 0:
+                self.root_unsat = True
+                break
 
             # Save unit clause literals for initial processing
-            if len(clause) == 1:
-                self.unit_clause_lits.append(clause[0])
+            if length == 1:
+                self.unit_clause_lits.append(self.lits[start])
+                continue
+
+            # Binary clauses never move their watches: falsifying one literal implies the other
+            first_literal, second_literal = self.lits[start], self.lits[start + 1]
+            if length == 2:
+                self.binary_watches[first_literal].append((second_literal, clause_index))
+                self.binary_watches[second_literal].append((first_literal, clause_index))
                 continue
 
-            # Setup watchers for clauses with >= 2 literals
-            first_literal, second_literal = clause[0], clause[1]
-            self.watches[first_literal].append(clause_index)
-            self.watches[second_literal].append(clause_index)
+            # Setup watchers for clauses with >= 3 literals
+            self.watches[first_literal].append((clause_index, second_literal))
+            self.watches[second_literal].append((clause_index, first_literal))
+
+    def num_clauses(self) -> int:
+        """
+        Number of clauses currently stored (original and learnt).
+        """
+        return len(self.clause_start) - 1
 
     def assign(self, variable: int, value: int) -> int:
         """
         Assign a value to a variable.
 
-        - Update assignment dict and trail accordingly.
-        - Update progress bar.
+        - Update assignment array and trail accordingly.
         """
         var = abs(variable)
 
         self.assignment[var] = value
+        self.lit_value[var] = value
+        self.lit_value[-var] = -value
 
-        self.assignment_trail.append(variable)
-        self.progress_bar.update(self.assignment)
+        self.assignment_trail[self.trail_top] = variable
+        self.trail_top += 1
         return var
 
     def unassign(self, variable: int):
         """
         Unassign a variable.
 
-        - Update assignment dict accordingly.
-        - Update progress bar.
+        - Update assignment array accordingly.
         """
 
         self.assignment[variable] = 0
-        self.progress_bar.update(self.assignment)
-
-
-    def lit_is_true(self, lit: int) -> bool:
-        """
-        Check if a literal is currently assigned True.
-        """
-        val = self.assignment[abs(lit)]
-        return val == (1 if lit > 0 else -1)
-
-    def lit_is_false(self, lit: int) -> bool:
-        """
-        Check if a literal is currently assigned False.
-        """
-        val = self.assignment[abs(lit)]
-        return val == (-1 if lit > 0 else 1)
-
-    def lit_is_unassigned(self, lit: int) -> bool:
-        """
-        Check if a literal is currently unassigned.
-        """
-        return self.assignment[abs(lit)] == 0
+        self.lit_value[variable] = 0
+        self.lit_value[-variable] = 0
 
     def _assign_internal(self, lit: int, level: int, reason: int | None):
         """
@@ -146,15 +167,15 @@ class SATSolver(ABC):
     def process_initial_unit_clauses(self) -> bool:
         """
         Process initial unit clauses before main propagation loop.
+        Called once by solve(); assignments land on the trail for propagate().
         Returns False if a conflict is detected, True otherwise.
         """
-        while self.unit_clause_lits:
-            lit = self.unit_clause_lits.popleft()
-            
-            # Check for consistency
-            if self.lit_is_true(lit):
+        for lit in self.unit_clause_lits:
+            # Check for consistency, reading the literal's value once
+            value = self.lit_value[lit]
+            if value == 1:
                 continue  # Already assigned, no problem
-            if self.lit_is_false(lit):
+            if value == -1:
                 return False  # Conflict: (X) and (-X) are both unit clauses
             
             # Assign the new literal. This adds it to the assignment_trail,
@@ -162,32 +183,6 @@ class SATSolver(ABC):
             self._assign_internal(lit, 0, None)
         return True
 
-    def _find_new_watcher_for_clause(self, clause: Clause, falsified_watcher: int, clause_index: int) -> bool:
-        """
-        Helper function to find new watcher for a clause if possible.
-        returns True if new watcher found, False otherwise.
-        """
-       
-        for i in range(2, len(clause)): # Start searching from index 2. The first two (0, 1) are the watchers.
-            new_lit = clause[i]
-            
-            # We are looking for any literal that is NOT False.
-            # (It can be True or Unassigned)
-            if not self.lit_is_false(new_lit):
-                
-                # Stop watching w1
-                self.watches[falsified_watcher].remove(clause_index)
-                
-                # Start watching new_lit
-                self.watches[new_lit].append(clause_index)
-                
-                # Update the clause: swap new_lit into w1's spot
-                clause[0], clause[i] = new_lit, falsified_watcher
-                
-                return True  
-                
-        return False
-
     def get_current_level(self) -> int:
         """
         Get the current decision level.
@@ -197,48 +192,99 @@ class SATSolver(ABC):
     def propagate(self) -> int | None:
         """
         Performs 2WL based unit propagation.
+        Works through the trail from prop_index, so each call only visits
+        the literals assigned since the previous one. The replacement watch
+        search is done inline on the CSR arrays, so the per-clause work is
+        plain indexing with no method calls. Binary clauses skip the clause
+        load and watch relocation entirely.
         
         Returns:
             None if no conflict.
             int (conflicting_clause_index) if a conflict is found.
         """
-
-        if not self.process_initial_unit_clauses():
-            return -1  # Conflict detected during initial unit clause processing
-
         current_level = self.get_current_level()
+        # Hot attributes bound once; trail_top and prop_index change under us, so stay on self
+        lits = self.lits
+        clause_start = self.clause_start
+        lit_value = self.lit_value
+        trail = self.assignment_trail
+        watches = self.watches
+        binary_watches = self.binary_watches
+        assign_internal = self._assign_internal
         
         # Propagation over the trail
-        while self.prop_index < len(self.assignment_trail):
-            lit = self.assignment_trail[self.prop_index]
+        while self.prop_index < self.trail_top:
+            lit = trail[self.prop_index]
             self.prop_index += 1
             falsified_lit = -lit
+
+            # Binary clauses first: the other literal is stored in the watch itself
+            for other_lit, clause_index in binary_watches[falsified_lit]:
+                other_value = lit_value[other_lit]
+                if other_value == 1:
+                    continue
+                if other_value == 0:
+                    assign_internal(other_lit, current_level, clause_index)
+                else:
+                    return clause_index
             
-            for clause_index in list(self.watches[falsified_lit]):
-                clause = self.clauses[clause_index]
-
-                # ensure clause[0] is the falsified watch
-                w1, w2 = clause[0], clause[1]
-                if w1 != falsified_lit:
-                    w1, w2 = w2, w1
-                    clause[0], clause[1] = w1, w2
-                
-                if self.lit_is_true(w2):
+            # Walk the watch list with a read index i and a write index j:
+            # clauses that keep watching falsified_lit are compacted to the
+            # front, clauses whose watch moves elsewhere are simply not copied
+            watch_list = watches[falsified_lit]
+            i = j = 0
+            n = len(watch_list)
+            while i < n:
+                watch = watch_list[i]
+                i += 1
+
+                # A true blocker satisfies the clause without loading it
+                clause_index, blocker = watch
+                if lit_value[blocker] == 1:
+                    watch_list[j] = watch
+                    j += 1
                     continue
-                    
-                found_new_watch = self._find_new_watcher_for_clause(clause, w1, clause_index)
+
+                start = clause_start[clause_index]
+
+                # Find which of the first two slots holds the falsified watch;
+                # w2 is the other one. Only the falsified slot is ever rewritten
+                w2 = lits[start]
+                if w2 == falsified_lit:
+                    w2 = lits[start + 1]
+                    falsified_slot = start
+                else:
+                    falsified_slot = start + 1
                 
-                if found_new_watch:
-                    continue 
+                # Truth value of the other watch, read once: 1 true, 0 unassigned, -1 false
+                w2_value = lit_value[w2]
+                if w2_value == 1:
+                    watch_list[j] = (clause_index, w2)
+                    j += 1
+                    continue
                     
-                # No new watcher found
-                if self.lit_is_unassigned(w2):
-                    # Unit clause! Propagate w2.
-                    self._assign_internal(w2, current_level, clause_index)
-                
-                elif self.lit_is_false(w2):
-                    # Conflict!
-                    return clause_index 
+                # Look for a replacement watch among the other literals:
+                # anything that is not false (true or unassigned) will do
+                for k in range(start + 2, clause_start[clause_index + 1]):
+                    new_lit = lits[k]
+                    if lit_value[new_lit] != -1:
+                        # Move the watch from falsified_lit to new_lit, swapping it into its slot
+                        watches[new_lit].append((clause_index, w2))
+                        lits[falsified_slot], lits[k] = new_lit, falsified_lit
+                        break
+                else:
+                    # No new watcher found, the clause keeps watching falsified_lit
+                    watch_list[j] = (clause_index, w2)
+                    j += 1
+                    if w2_value == 0:
+                        # Unit clause! Propagate w2.
+                        assign_internal(w2, current_level, clause_index)
+                    else:
+                        # Conflict! Keep the unvisited tail of the watch list
+                        del watch_list[j:i]
+                        return clause_index
+
+            del watch_list[j:]
         
         return None # No conflict
 
@@ -254,13 +300,13 @@ class SATSolver(ABC):
         """
         current_level_idx = self.get_current_level()
         
-        self.level_start.append(len(self.assignment_trail))
+        self.level_start.append(self.trail_top)
 
-        var = abs(lit)
-        self.decisions.append({'var': var, 'tried_false': (lit < 0)})
+        self.decisions.append(lit)
         
         self._assign_internal(lit, current_level_idx + 1, None) # Levels are 1-based
-        self.progress_bar.update(self.assignment) # assign() already does this
+        # Progress is only reported per decision; the trail length is the number of assigned vars
+        self.progress_bar.update(self.trail_top)
 
     @abstractmethod
     def pick_unassigned_literal(self) -> int | None:
@@ -281,79 +327,223 @@ class FirstPick(SATSolver):
         """
         Pick the first unassigned literal.
         """
-        for var, val in self.assignment.items():
-            if val == 0:
-                return var 
-        return None
+        try:
+            return self.assignment.index(0, 1)
+        except ValueError:
+            return None
     
 class LastPick(SATSolver):
+    last_ptr: int
+
+    def __init__(self, clauses: Clauses, num_vars: int):
+        """
+        Initialize last-pick solver.
+        - last_ptr: no var after this one is unassigned
+        """
+        super().__init__(clauses, num_vars)
+        self.last_ptr = num_vars
+
+    def unassign(self, variable: int):
+        """
+        Unassign a variable, moving last_ptr up to it if it comes later.
+        """
+        super().unassign(variable)
+        if variable > self.last_ptr:
+            self.last_ptr = variable
+
     def pick_unassigned_literal(self) -> int | None:
         """
-        Pick the last unassigned literal.
+        Pick the last unassigned literal, walking last_ptr down past assigned vars.
         """
-        for var, val in reversed(self.assignment.items()):
-            if val == 0:
-                return var
-        return None
+        assignment = self.assignment
+        var = self.last_ptr
+        while var > 0 and assignment[var] != 0:
+            var -= 1
+        self.last_ptr = var
+        return var if var else None
     
 class RandomPick(SATSolver):
     def pick_unassigned_literal(self) -> int | None:
         """
         Pick a random unassigned literal.
         """
-        unassigned_vars = [var for var, val in self.assignment.items() if val == 0]
+        # Rejection sampling is still uniform over the unassigned vars and, while
+        # a fair share of them is free, avoids building the list on every pick
+        assignment = self.assignment
+        for _ in range(16):
+            var = r.randint(1, self.num_vars)
+            if assignment[var] == 0:
+                return var
+        unassigned_vars = [var for var in range(1, len(assignment)) if assignment[var] == 0]
         if not unassigned_vars:
             return None
         return r.choice(unassigned_vars)
 
 class HeuristicPick(SATSolver):
-    phase: dict[int, int]
-    var_frequency: dict[int, int]
+    phase: bytearray
+    var_frequency: list[int]
+    order: list[int]
+    rank: list[int]
+    order_ptr: int
     
     def __init__(self, clauses: Clauses, num_vars: int):
         """
         Initialize heuristic-based solver.
+        - order: vars by decreasing frequency (ties by index), rank: position of each var in it
+        - order_ptr: no var before this position in order is unassigned
         """
         super().__init__(clauses, num_vars)
 
-        # Frequency heuristic: count how often each variable appears
-        self.var_frequency = {i: 0 for i in range(1, num_vars + 1)}
-        for clause in self.clauses:
-            for lit in clause:
-                v = abs(lit)
-                self.var_frequency[v] += 1
+        # Frequency heuristic: count how often each variable appears, indexed by var
+        var_frequency = [0] * (num_vars + 1)
+        for lit in self.lits:
+            var_frequency[abs(lit)] += 1
+        self.var_frequency = var_frequency
+
+        # Frequencies never change, so the decision order can be fixed up front
+        self.order = sorted(range(1, num_vars + 1), key=lambda var: -var_frequency[var])
+        self.rank = [0] * (num_vars + 1)
+        for position, var in enumerate(self.order):
+            self.rank[var] = position
+        self.order_ptr = 0
 
-        # Phase saving: remember last assigned polarity
-        self.phase = {i: 1 for i in range(1, num_vars + 1)}
+        # Phase saving: remember last assigned polarity (1 True, 0 False), indexed by var
+        self.phase = bytearray(b'\x01' * (num_vars + 1))
 
     def assign(self, variable: int, value: int):
         """
         Assign a value to a variable with phase saving.
         """
         var = super().assign(variable, value)
-        self.phase[var] = value
+        self.phase[var] = value > 0
         return var
+
+    def unassign(self, variable: int):
+        """
+        Unassign a variable, moving order_ptr back to it if it comes earlier in the order.
+        """
+        super().unassign(variable)
+        if self.rank[variable] < self.order_ptr:
+            self.order_ptr = self.rank[variable]
     
     def pick_unassigned_literal(self) -> int | None:
         """
         Frequency + phase saving heuristic:
-        - pick variable with highest frequency among unassigned vars
+        - pick variable with highest frequency among unassigned vars,
+          by advancing order_ptr past assigned vars in the precomputed order
         - choose polarity using phase saving
         """
-        best_var = None
-        best_score = -1
-
-        for var, val in self.assignment.items():
-            if val != 0:
-                continue
+        order = self.order
+        assignment = self.assignment
+        ptr = self.order_ptr
+        while ptr < len(order) and assignment[order[ptr]] != 0:
+            ptr += 1
+        self.order_ptr = ptr
 
-            score = self.var_frequency[var]
-            if score > best_score:
-                best_score = score
-                best_var = var
-
-        if best_var is None:
+        if ptr == len(order):
             return None
 
         # use phase saving for the sign
-        return best_var * self.phase.get(best_var, 1)
\ No newline at end of file
+        best_var = order[ptr]
+        return best_var if self.phase[best_var] else -best_var
+
+class VSIDSPick(SATSolver):
+    activity: list[float]
+    var_inc: float
+    var_decay: float
+    order_heap: list[tuple[float, int]]
+    in_heap: bytearray
+    saved_phase: array
+
+    def __init__(self, clauses: Clauses, num_vars: int):
+        """
+        Initialize VSIDS-based solver.
+        - activity score per variable, bumped by conflict analysis and decayed per conflict
+        - order_heap: max-heap (negated activity) of candidate vars with lazy deletion
+        - in_heap: 1 if the var has a live entry (one with its current activity) in order_heap
+        - saved_phase: last value of each var, reused as the decision polarity
+        """
+        super().__init__(clauses, num_vars)
+
+        self.activity = [0.0] * (num_vars + 1)
+        self.var_inc = 1.0
+        self.var_decay = 0.95
+
+        # All activities start equal, so this list is already a valid heap
+        self.order_heap = [(0.0, var) for var in range(1, num_vars + 1)]
+        self.in_heap = bytearray(b'\x01' * (num_vars + 1))
+
+        # Phase saving: 0 (never assigned) decides positive
+        self.saved_phase = array('b', bytes(num_vars + 1))
+
+    def bump_activity(self, var: int):
+        """
+        Increase the activity of a variable involved in a conflict.
+        This makes its current heap entry stale (skipped when picking); a new
+        one is pushed now if the var is unassigned, otherwise on unassign.
+        """
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self._rescale_activity()
+            return
+        if self.assignment[var] == 0:
+            heappush(self.order_heap, (-self.activity[var], var))
+            self.in_heap[var] = 1
+        else:
+            self.in_heap[var] = 0
+
+    def decay_activity(self):
+        """
+        Decay all activities at once by growing the bump increment instead.
+        """
+        self.var_inc /= self.var_decay
+
+    def _rescale_activity(self):
+        """
+        Scale activities down before they overflow and rebuild the heap.
+        """
+        self.activity = [act * 1e-100 for act in self.activity]
+        self.var_inc *= 1e-100
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        """
+        Rebuild order_heap with exactly one live entry per unassigned var.
+        """
+        assignment = self.assignment
+        self.order_heap = [(-self.activity[var], var)
+                           for var in range(1, len(assignment)) if assignment[var] == 0]
+        heapify(self.order_heap)
+        self.in_heap = bytearray(value == 0 for value in assignment)
+
+    def unassign(self, variable: int):
+        """
+        Unassign a variable, remembering its phase, and make it a decision candidate again.
+        Only pushes a heap entry if the var has no live one left.
+        """
+        self.saved_phase[variable] = self.assignment[variable]
+        super().unassign(variable)
+        if not self.in_heap[variable]:
+            heappush(self.order_heap, (-self.activity[variable], variable))
+            self.in_heap[variable] = 1
+
+    def pick_unassigned_literal(self) -> int | None:
+        """
+        Pick the unassigned variable with the highest activity,
+        signed by its saved phase. Outdated entries and entries of assigned
+        vars are dropped on the way; the chosen var's entry stays in the heap
+        and is dropped the same way once it has been assigned.
+        """
+        # Each bump leaves one stale entry behind; once they clearly outnumber
+        # the vars, dropping them all at once is cheaper than popping them
+        if len(self.order_heap) > 4 * self.num_vars:
+            self._rebuild_heap()
+        heap = self.order_heap
+        while heap:
+            neg_activity, var = heap[0]
+            if -neg_activity == self.activity[var]:
+                if self.assignment[var] == 0:
+                    return var if self.saved_phase[var] >= 0 else -var
+                self.in_heap[var] = 0  # live entry of an assigned var
+            heappop(heap)
+        return None
@@ -1,5 +1,6 @@
 import math
 
+
 def visualize_sudoku(model: list[int], n: int):
     """
     Visualize a Sudoku solution from the SAT model. Supports 9x9, 16x16, 25x25
@@ -16,54 +17,37 @@ def visualize_sudoku(model: list[int], n: int):
     grid = [[0 for _ in range(n)] for _ in range(n)]
     print(f"Sudoku Solution ({n}x{n}):")
 
-    # Map positive literals to (row, col, value)
+    # Map positive literals to (row, col, value); anything past n^3 is an
+    # auxiliary encoding variable and not part of the grid
+    num_cell_vars = n * n * n
     for literal in model:
-        if literal <= 0:
+        if not 0 < literal <= num_cell_vars:
             continue
-        var = literal - 1  # convert to 0-based index
-        
-        row = var // (n * n)
-        col = (var % (n * n)) // n
-        val = (var % n) + 1
-        
-        if 0 <= row < n and 0 <= col < n:
-            grid[row][col] = val
+        # var - 1 == row*n*n + col*n + (val - 1)
+        row, rest = divmod(literal - 1, n * n)
+        col, val = divmod(rest, n)
+        grid[row][col] = val + 1
 
     # Cell width depends on max digits (e.g., 2 for 16x16 or 25x25)
     cell_width = len(str(n))
 
-    # --- THIS IS THE CORRECTED SECTION ---
-
-    # Build a sample printed row (using empty cells) the same way real rows are formatted,
-    # then convert that sample row into a separator line by mapping '|' -> '+' and every
-    # other character -> '-' so lengths exactly match the printed row (including spaces).
-    sample_parts = []
-    for j in range(n):
-        if j % block == 0:
-            sample_parts.append('| ')
-        sample_parts.append('.' * cell_width)  # fmt_cell(0) -> dots
-        sample_parts.append(' ')
-    sample_parts.append('|')
-    sample_row = ''.join(sample_parts)
-    sep_line = ''.join('+' if ch == '|' else '-' for ch in sample_row)
-    # --- END OF CORRECTION ---
+    # Separator line with the same length as a printed row: every '|' of the
+    # row becomes '+' and everything else '-'. A block prints as '| ' followed by
+    # `block` cells of cell_width chars plus a space, and the row ends with '|'
+    block_sep = '+-' + '-' * ((cell_width + 1) * block)
+    sep_line = block_sep * (n // block) + '+'
 
-    # Helper to format a single cell
-    def fmt_cell(num: int) -> str:
-        if num == 0:
-            return '.' * cell_width
-        return str(num).rjust(cell_width)
+    # Row template: '| ' before every block, each cell right-aligned to
+    # cell_width and followed by a space, '|' at the end
+    row_fmt = ''.join(
+        ('| ' if j % block == 0 else '') + '{:>%d} ' % cell_width for j in range(n)
+    ) + '|'
+    # What each value prints as; empty cells (0) are shown as dots
+    cell_text = ['.' * cell_width] + [str(v) for v in range(1, n + 1)]
 
     # Print the grid
     print(sep_line)
     for i, row in enumerate(grid):
-        parts = []
-        for j, num in enumerate(row):
-            if j % block == 0:
-                parts.append('| ')
-            parts.append(fmt_cell(grid[i][j]))
-            parts.append(' ')
-        parts.append('|')
-        print(''.join(parts))
+        print(row_fmt.format(*[cell_text[num] for num in row]))
         if (i + 1) % block == 0:
             print(sep_line)